@@ -1,4 +1,5 @@
 # src/app.py
+import hashlib
 import json
 import random
 from datetime import date, timedelta
@@ -9,13 +10,12 @@ import streamlit as st
 from inference import InferenceEngine
 
 # ------------------------------------------------------------------ #
-# Paths & colours
+# Paths
 # ------------------------------------------------------------------ #
-MODEL_PATH = Path("model.joblib")
+MODEL_PATH = Path("model.ubj")
+PREP_PATH  = Path("prep.joblib")
 LOGO_PATH  = Path("assets/helloprint_logo.png")
-
-BLACK       = "#111111"
-DARK_ORANGE = "#CC7A00"
+CSS_PATH   = Path("assets/style.css")  # slider colour: HelloPrint dark orange
 
 # ------------------------------------------------------------------ #
 # Page config
@@ -26,19 +26,11 @@ st.set_page_config(page_title="HelloPrint • Quote Optimiser",
 # ------------------------------------------------------------------ #
 # Minimal CSS (slider styling only; other colours via theme)
 # ------------------------------------------------------------------ #
-st.markdown(
-    f"""
-    <style>
-      .stSlider .rc-slider-rail   {{ background:{DARK_ORANGE}!important; height:6px; }}
-      .stSlider .rc-slider-track {{ background:{DARK_ORANGE}; height:6px; }}
-      .stSlider .rc-slider-handle {{
-        background:{DARK_ORANGE}; border:2px solid {DARK_ORANGE};
-        width:16px; height:16px; margin-top:-5px;
-      }}
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+@st.cache_resource
+def load_css() -> str:
+    return CSS_PATH.read_text() if CSS_PATH.exists() else ""
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # ------------------------------------------------------------------ #
 # Header
@@ -80,35 +72,62 @@ st.markdown(
 # ------------------------------------------------------------------ #
 # Helper functions
 # ------------------------------------------------------------------ #
+@st.cache_resource
+def get_engine(model_path: str, version: tuple[int, int]) -> InferenceEngine:
+    """Load the pipeline once per process; `version` invalidates on retrain."""
+    return InferenceEngine(model_path)
+
+def model_version() -> tuple[int, int]:
+    """mtimes of both files the engine loads, so a half-finished save misses."""
+    return MODEL_PATH.stat().st_mtime_ns, PREP_PATH.stat().st_mtime_ns
+
 PRODUCTS = ["flyer", "poster", "t-shirt"]
 REGIONS = ["NL", "DE", "FR", "ES"]
 
-def mock_parse_pdf() -> dict:
+def mock_parse_pdf(rng: random.Random) -> dict:
     return {
-        "client_id": f"C-{random.randint(100, 999)}",
-        "region": random.choice(REGIONS),
-        "product_type": random.choice(PRODUCTS),
-        "quantity": random.choice([500, 1000, 1500, 2000]),
+        "client_id": f"C-{rng.randint(100, 999)}",
+        "region": rng.choice(REGIONS),
+        "product_type": rng.choice(PRODUCTS),
+        "quantity": rng.choice([500, 1000, 1500, 2000]),
         "deadline": (date.today() + timedelta(days=14)).isoformat(),
     }
 
-def mock_offers(rfq: dict, n: int = 6) -> pd.DataFrame:
-    base_price = random.uniform(1.2, 1.8)
+def mock_offers(rfq: dict, rng: random.Random, n: int = 6) -> pd.DataFrame:
+    base_price = rng.uniform(1.2, 1.8)
     rows = []
     for _ in range(n):
         rows.append({
-            "supplier_id": random.randint(1, 30),
+            "supplier_id": rng.randint(1, 30),
             "product_type": rfq["product_type"],
-            "unit_price": round(base_price * random.uniform(0.9, 1.15), 2),
-            "lead_time_days": random.randint(4, 10),
-            "quoted_margin_pct": round(random.uniform(0.18, 0.30), 2),
+            "unit_price": round(base_price * rng.uniform(0.9, 1.15), 2),
+            "lead_time_days": rng.randint(4, 10),
+            "quoted_margin_pct": round(rng.uniform(0.18, 0.30), 2),
             "quantity": rfq["quantity"],
-            "tier": random.choice(["A", "B", "C"]),
+            "tier": rng.choice(["A", "B", "C"]),
             "region": rfq["region"],
-            "on_time_rate": round(random.uniform(0.88, 0.98), 2),
+            "on_time_rate": round(rng.uniform(0.88, 0.98), 2),
         })
     return pd.DataFrame(rows)
 
+@st.cache_data(show_spinner=False)
+def build_rfq_and_offers(pdf_bytes: bytes) -> tuple[dict, pd.DataFrame]:
+    """Mock OCR + shortlist, seeded on the PDF so re-uploads give the same RFQ."""
+    rng = random.Random(hashlib.sha256(pdf_bytes).hexdigest())
+    rfq = mock_parse_pdf(rng)
+    return rfq, mock_offers(rfq, rng)
+
+@st.cache_data(show_spinner=False)
+def score_offers(
+    offers_df: pd.DataFrame, margin_floor: float, version: tuple[int, int]
+) -> tuple[dict, pd.DataFrame]:
+    engine = get_engine(str(MODEL_PATH), version)
+    return engine.select_best_offer(offers_df, margin_floor=margin_floor)
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+
 # ------------------------------------------------------------------ #
 # Step 1 – Upload RFQ PDF
 # ------------------------------------------------------------------ #
@@ -116,7 +135,7 @@ st.subheader("1. Upload RFQ (PDF)")
 pdf_file = st.file_uploader("Choose a PDF", type=["pdf"])
 
 if pdf_file:
-    rfq = mock_parse_pdf()
+    rfq, offers_df = build_rfq_and_offers(pdf_file.getvalue())
     st.table(pd.DataFrame([rfq]))
 
 # ------------------------------------------------------------------ #
@@ -124,16 +143,13 @@ if pdf_file:
 # ------------------------------------------------------------------ #
 st.subheader("2. Request quotation")
 if pdf_file and st.button("Calculate best offer"):
-    offers_df = mock_offers(rfq)
-
     # ---- load model
-    if not MODEL_PATH.exists():
-        st.error("model.joblib not found. Run `make train` first.")
+    if not (MODEL_PATH.exists() and PREP_PATH.exists()):
+        st.error("model.ubj / prep.joblib not found. Run `make train` first.")
         st.stop()
-    engine = InferenceEngine(MODEL_PATH, margin_floor=margin_floor)
 
     try:
-        best, ranked = engine.select_best_offer(offers_df)
+        best, ranked = score_offers(offers_df, margin_floor, model_version())
     except RuntimeError as e:
         st.error(f"🚫 {e}")
         st.stop()
@@ -175,7 +191,7 @@ if pdf_file and st.button("Calculate best offer"):
             )
 
         # download button
-        csv = ranked[cols].to_csv(index=False).encode()
+        csv = to_csv_bytes(ranked[cols])
         st.download_button("Download CSV", csv, "ranked_offers.csv",
                            mime="text/csv", use_container_width=True)
 else:
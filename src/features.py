@@ -4,33 +4,68 @@ Join raw synthetic tables and build a scikit-learn pipeline
 that transforms them into a feature matrix suitable for XGBoost.
 """
 
+import os
+import warnings
 from pathlib import Path
 from typing import Tuple
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import KBinsDiscretizer, OrdinalEncoder
 
 DATA_DIR = Path("data/synthetic")
+RAW_TABLES = ("deals", "supplier_offers", "deal_outcome", "suppliers")
+RAW_CACHE = Path(".cache/raw.feather")
 
 
 # ----------------------------------------------------------------------
 # 1. Load & join raw tables
 # ----------------------------------------------------------------------
 def load_raw() -> pd.DataFrame:
-    """Return one row per supplier offer with deal & supplier context."""
-    deals     = pd.read_csv(DATA_DIR / "deals.csv")
-    offers    = pd.read_csv(DATA_DIR / "supplier_offers.csv")
-    outcome   = pd.read_csv(DATA_DIR / "deal_outcome.csv")
-    suppliers = pd.read_csv(DATA_DIR / "suppliers.csv")
-
-    df = (
+    """Return one row per supplier offer with deal & supplier context.
+    Cached in RAW_CACHE while it is newer than the CSVs and this module."""
+    csvs = [DATA_DIR / f"{name}.csv" for name in RAW_TABLES]
+    missing = [str(p) for p in csvs if not p.exists()]
+    if missing:
+        raise FileNotFoundError(
+            f"raw tables not found: {', '.join(missing)} (run `make data`)"
+        )
+
+    sources = csvs + [Path(__file__)]
+    if RAW_CACHE.exists() and all(
+        RAW_CACHE.stat().st_mtime_ns > p.stat().st_mtime_ns for p in sources
+    ):
+        return feather.read_table(RAW_CACHE, memory_map=True).to_pandas()
+
+    table = _join_raw()
+    # write aside and rename, so a concurrent reader never sees half a file
+    RAW_CACHE.parent.mkdir(exist_ok=True)
+    tmp = RAW_CACHE.with_name(f"{RAW_CACHE.name}.{os.getpid()}.tmp")
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, RAW_CACHE)
+    return table.to_pandas()
+
+
+def _join_raw() -> pa.Table:
+    # Arrow's multi-threaded CSV reader + hash joins, one pandas frame at the end
+    deals     = pa_csv.read_csv(DATA_DIR / "deals.csv")
+    offers    = pa_csv.read_csv(DATA_DIR / "supplier_offers.csv")
+    outcome   = pa_csv.read_csv(DATA_DIR / "deal_outcome.csv")
+    suppliers = pa_csv.read_csv(DATA_DIR / "suppliers.csv")
+
+    # Arrow joins do not preserve row order; carry the offer order explicitly
+    offers = offers.append_column("_row", pa.array(np.arange(offers.num_rows)))
+
+    table = (
         offers
-        .merge(deals,     on="deal_id",   how="left", suffixes=("", "_deal"))
-        .merge(suppliers, on="supplier_id", how="left", suffixes=("", "_sup"))
-        .merge(outcome,   on="deal_id", how="left")
+        .join(deals,     keys="deal_id",     join_type="left outer")
+        .join(suppliers, keys="supplier_id", join_type="left outer")
+        .join(outcome,   keys="deal_id",     join_type="left outer")
     )
-    return df
+    return table.sort_by("_row").drop_columns("_row")
 
 
 # ----------------------------------------------------------------------
@@ -59,30 +94,69 @@ def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
 # ----------------------------------------------------------------------
 # 3. Build sklearn ColumnTransformer
 # ----------------------------------------------------------------------
-def build_preprocess() -> ColumnTransformer:
-    num_cols = [
-        "unit_price",
-        "lead_time_days",
-        "quoted_margin_pct",
-        "price_delta_pct",
-        "lead_delta_days",
-        "quantity_log",
-        "on_time_rate",
-    ]
-    cat_cols = [
-        "product_type",
-        "tier",
-        "region",
-    ]
-
+# continuous columns, pre-binned to quantiles
+BIN_COLS = [
+    "unit_price",
+    "price_delta_pct",
+    "quantity_log",
+]
+# low-cardinality numeric columns (whole days, 2-3 decimal rates), kept as-is
+NUM_COLS = [
+    "lead_time_days",
+    "quoted_margin_pct",
+    "lead_delta_days",
+    "on_time_rate",
+]
+CAT_COLS = [
+    "product_type",
+    "tier",
+    "region",
+]
+
+# column types of the transformed matrix, for XGBoost's native categoricals
+FEATURE_TYPES = ["q"] * (len(BIN_COLS) + len(NUM_COLS)) + ["c"] * len(CAT_COLS)
+
+
+def build_preprocess(n_jobs: int | None = None) -> ColumnTransformer:
+    """Quantile-bin continuous columns, pass the rest through and encode
+    categoricals as integer codes (unseen → NaN) for XGBoost."""
     return ColumnTransformer(
         transformers=[
-            ("num", StandardScaler(), num_cols),
-            ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
-        ]
+            (
+                "bin",
+                KBinsDiscretizer(
+                    n_bins=256,
+                    encode="ordinal",
+                    strategy="quantile",
+                    quantile_method="averaged_inverted_cdf",
+                    dtype=np.float32,
+                ),
+                BIN_COLS,
+            ),
+            ("num", "passthrough", NUM_COLS),
+            (
+                "cat",
+                OrdinalEncoder(
+                    handle_unknown="use_encoded_value", unknown_value=np.nan
+                ),
+                CAT_COLS,
+            ),
+        ],
+        n_jobs=n_jobs,
     )
 
 
+def fit_preprocess(prep: ColumnTransformer, X: pd.DataFrame,
+                   y: pd.Series | None = None) -> ColumnTransformer:
+    """Fit `prep`, muting the expected duplicate-quantile warnings."""
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            "ignore", message="Bins whose width are too small",
+            category=UserWarning,
+        )
+        return prep.fit(X, y)
+
+
 # ----------------------------------------------------------------------
 # 4. Convenience function → X, y
 # ----------------------------------------------------------------------
@@ -105,4 +179,8 @@ def prepare_xy(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
         ],
         errors="ignore",
     )
-    return X, y
\ No newline at end of file
+
+    # float32 is what XGBoost works in: halve the feature bytes up front
+    for c in X.select_dtypes("float64").columns:
+        X[c] = X[c].astype("float32")
+    return X, y.astype("int8")
\ No newline at end of file
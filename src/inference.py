@@ -5,7 +5,7 @@ Inference + optimisation for the HelloPrint PoC.
 Usage example
 -------------
 from inference import InferenceEngine
-engine = InferenceEngine("model.joblib", margin_floor=0.20)
+engine = InferenceEngine("model.ubj", margin_floor=0.20)  # + prep.joblib
 
 # df_offers has one row per supplier offer for the same deal -------------
 # Required columns: identical to training set (unit_price, lead_time_days, ...)
@@ -19,66 +19,118 @@ from typing import Tuple
 
 import joblib
 import pandas as pd
-import pulp
 import numpy as np
+import xgboost as xgb
 
 
 class InferenceEngine:
-    def __init__(self, model_path: str | Path, margin_floor: float = 0.20) -> None:
-        pipeline = joblib.load(model_path)
-        self.prep  = pipeline.named_steps["prep"]    # ColumnTransformer
-        self.model = pipeline.named_steps["clf"]     # XGBoost classifier
+    def __init__(
+        self,
+        model_path: str | Path,
+        margin_floor: float = 0.20,
+        use_treelite: bool = False,
+        prep_path: str | Path | None = None,
+    ) -> None:
+        # UBJ booster + fitted ColumnTransformer (prep.joblib next to it)
+        if prep_path is None:
+            prep_path = Path(model_path).with_name("prep.joblib")
+        self.prep = joblib.load(prep_path)
+        self._booster = xgb.Booster(model_file=str(model_path))
+        # early-stopped models keep trailing rounds; score up to the best one
+        best_iteration = self._booster.attr("best_iteration")
+        if best_iteration is not None:
+            self._booster = self._booster[: int(best_iteration) + 1]
         self.margin_floor = margin_floor
 
+        self._predictor = None
+        if use_treelite:
+            self._compile(Path(model_path))
+
+    def _compile(self, model_path: Path) -> None:
+        """Compile the booster with Treelite (`treelite` extra + gcc); the .so
+        is cached next to the model, keyed on its mtime."""
+        import tl2cgen
+        import treelite
+
+        mtime = model_path.stat().st_mtime_ns
+        libpath = model_path.with_name(f"{model_path.stem}.{mtime}.so")
+        if not libpath.exists():
+            tl2cgen.export_lib(
+                treelite.frontend.from_xgboost(self._booster),
+                toolchain="gcc",
+                libpath=str(libpath),
+                params={"parallel_comp": 0},
+            )
+        self._predictor = tl2cgen.Predictor(str(libpath))
+
     def _add_derived(self, df: pd.DataFrame) -> pd.DataFrame:
         """Compute the same engineered features used during training."""
-        df = df.copy()
-        df["price_delta_pct"] = df.unit_price / df.unit_price.min() - 1
-        df["lead_delta_days"] = df.lead_time_days - df.lead_time_days.min()
-        df["quantity_log"] = np.log1p(df.quantity)
-        return df
+        up = df["unit_price"].to_numpy()
+        lt = df["lead_time_days"].to_numpy()
+        qt = df["quantity"].to_numpy()
+        # assign() returns a new frame; float32 is what XGBoost scores in
+        return df.assign(
+            price_delta_pct=(up / up.min() - 1.0).astype(np.float32),
+            lead_delta_days=(lt - lt.min()).astype(np.float32),
+            quantity_log=np.log1p(qt).astype(np.float32),
+        )
+
+    def _predict_prob_fe(self, df_fe: pd.DataFrame) -> np.ndarray:
+        """Score a frame that already carries the engineered features."""
+        return self._predict_matrix(self.prep.transform(df_fe))
+
+    def _predict_matrix(self, X) -> np.ndarray:
+        """Score an already preprocessed feature matrix."""
+        if self._predictor is not None:
+            return self._predict_compiled(X)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self._booster.inplace_predict(X)
+
+    def _predict_compiled(self, X) -> np.ndarray:
+        import tl2cgen
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self._predictor.predict(tl2cgen.DMatrix(X)).reshape(-1)
 
     # ---------------------------- public -------------------------
     def predict_prob(self, df: pd.DataFrame) -> pd.Series:
         df_fe = self._add_derived(df)
-        X = self.prep.transform(df_fe)
-        return pd.Series(self.model.predict_proba(X)[:, 1], index=df.index)
+        return pd.Series(self._predict_prob_fe(df_fe), index=df.index)
 
     def select_best_offer(
-        self, offers: pd.DataFrame
+        self, offers: pd.DataFrame, margin_floor: float | None = None
     ) -> Tuple[dict, pd.DataFrame]:
         """
         Score offers, optimise utility, and return:
         - best_offer (dict)
         - ranked_offers (DataFrame ordered by utility desc)
+
+        `margin_floor` overrides the engine default for this call only.
         """
-        df = offers.copy().reset_index(drop=True)
+        if margin_floor is None:
+            margin_floor = self.margin_floor
 
-        df = self._add_derived(df)
-        
-        df["p_win"] = self.predict_prob(df)
+        # _add_derived returns a new frame, so the caller's offers stay intact
+        df = self._add_derived(offers)
+        X = self.prep.transform(df)
+        df["p_win"] = self._predict_matrix(X)
         df["utility"] = df["p_win"] * df["quoted_margin_pct"]
 
         # --- optimisation ---
-        prob = pulp.LpProblem("choose_offer", pulp.LpMaximize)
-        x_vars = pulp.LpVariable.dicts("x", df.index, 0, 1, cat="Binary")
-
-        # objective
-        prob += pulp.lpSum(df.utility[i] * x_vars[i] for i in df.index)
-
-        # constraints
-        prob += pulp.lpSum(df.quoted_margin_pct[i] * x_vars[i] for i in df.index) >= self.margin_floor
-        prob += pulp.lpSum(x_vars[i] for i in df.index) == 1
-
-        # solve
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
-
-        if pulp.LpStatus[prob.status] != "Optimal":
+        # pick one offer: argmax of utility over those above the margin floor
+        utility = df["utility"].to_numpy()
+        feasible = df["quoted_margin_pct"].to_numpy() >= margin_floor
+        if not feasible.any():
             raise RuntimeError("No feasible offer meets margin floor")
 
-        df["selected"] = [int(x_vars[i].value()) for i in df.index]
-        df = df.sort_values("utility", ascending=False).reset_index(drop=True)
-        best_row = df.loc[df.selected == 1].iloc[0]
+        best_i = int(np.argmax(np.where(feasible, utility, -np.inf)))
+        selected = np.zeros(len(df), dtype=int)
+        selected[best_i] = 1
+        df["selected"] = selected
+        best_row = df.iloc[best_i]
+
+        order = np.argsort(-utility, kind="stable")
+        df = df.iloc[order].reset_index(drop=True)
 
         best_offer = {
             "supplier_id": best_row["supplier_id"],
@@ -97,7 +149,7 @@ if __name__ == "__main__":
         print("Usage: python inference.py sample_offers.json")
         sys.exit(1)
 
-    engine = InferenceEngine("model.joblib", margin_floor=0.20)
+    engine = InferenceEngine("model.ubj", margin_floor=0.20)
     offers_df = pd.read_json(sys.argv[1])
     best, ranked = engine.select_best_offer(offers_df)
     print("Selected offer →", best)
@@ -10,11 +10,13 @@ Creates four CSVs under data/synthetic/:
 """
 
 from __future__ import annotations
+import uuid
 from pathlib import Path
-from typing import List
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from faker import Faker
 
 
@@ -81,83 +83,113 @@ class SyntheticGenerator:
         return pd.DataFrame(rows)
 
     def _build_deals(self) -> pd.DataFrame:
-        rows: list[dict] = []
-        start = pd.Timestamp("2024-01-01")
-        for _ in range(self.n_deals):
-            rows.append(
-                {
-                    "deal_id": self.fake.uuid4(),
-                    "customer_id": self.fake.uuid4(),
-                    "product_type": self.rng.choice(self.PRODUCTS),
-                    "quantity": int(round(self.rng.lognormal(6, 0.4))),
-                    "submitted_ts": start
-                    + pd.Timedelta(hours=int(self.rng.integers(0, self.n_deals))),
-                }
-            )
-        return pd.DataFrame(rows)
+        n = self.n_deals
+        start = np.datetime64("2024-01-01", "ns")
+        hours = self.rng.integers(0, n, size=n).astype("timedelta64[h]")
+        return pd.DataFrame(
+            {
+                "deal_id": self._uuids(n),
+                "customer_id": self._uuids(n),
+                "product_type": self.rng.choice(self.PRODUCTS, size=n),
+                "quantity": np.round(self.rng.lognormal(6, 0.4, size=n)).astype(int),
+                "submitted_ts": start + hours,
+            }
+        )
+
+    def _uuids(self, n: int) -> list[str]:
+        """Batch of random (v4) UUID strings drawn from the seeded rng."""
+        raw = self.rng.bytes(16 * n)
+        return [
+            str(uuid.UUID(bytes=raw[i : i + 16], version=4))
+            for i in range(0, 16 * n, 16)
+        ]
 
     def _build_offers(self) -> pd.DataFrame:
         """Generate supplier_offers rows (3–6 offers per deal, if available)."""
-        rows: List[dict] = []
-
-        for _, deal in self.deals.iterrows():
-            # filter suppliers that can produce this product
-            eligible = self.suppliers[
-                self.suppliers.product_capability == deal.product_type
-            ]
-
-            if eligible.empty:
-                # no supplier makes this product → skip deal
-                continue
-
-            # decide how many offers (3–6), but cap by availability
-            k_requested = int(self.rng.integers(3, 7))
-            k = min(k_requested, len(eligible))
-
-            sample = self.rng.choice(
-                eligible.supplier_id, size=k, replace=False
-            )
-
-            base_price = self.rng.normal(1.5, 0.2)
-
-            # create one offer row per sampled supplier
-            for sid in sample:
-                rows.append(
-                    {
-                        "offer_id": self.fake.uuid4(),
-                        "deal_id": deal.deal_id,
-                        "supplier_id": int(sid),
-                        "unit_price": round(base_price * self.rng.uniform(0.9, 1.15), 3),
-                        "lead_time_days": int(self.rng.integers(3, 14)),
-                        "quoted_margin_pct": round(self.rng.uniform(0.18, 0.30), 3),
-                        "offer_ts": pd.Timestamp(deal.submitted_ts)
-                        + pd.Timedelta(hours=int(self.rng.integers(2, 48))),
-                    }
-                )
-
-        return pd.DataFrame(rows)
+        # eligible supplier ids per product, padded into one matrix
+        pools = [
+            self.suppliers.loc[
+                self.suppliers.product_capability == p, "supplier_id"
+            ].to_numpy()
+            for p in self.PRODUCTS
+        ]
+        pool_len = np.array([len(pool) for pool in pools])
+        pool_mat = np.full((len(pools), pool_len.max()), -1, dtype=np.int64)
+        for i, pool in enumerate(pools):
+            pool_mat[i, : len(pool)] = pool
+
+        n_deals = len(self.deals)
+        prod = pd.Categorical(
+            self.deals.product_type, categories=self.PRODUCTS
+        ).codes
+
+        # decide how many offers (3–6), but cap by availability; deals whose
+        # product no supplier makes get k = 0 and are skipped
+        k = np.minimum(self.rng.integers(3, 7, size=n_deals), pool_len[prod])
+
+        # sample k suppliers per deal without replacement: shuffle each
+        # deal's pool via random sort keys and keep the first k
+        keys = self.rng.random((n_deals, pool_mat.shape[1]))
+        keys[np.arange(pool_mat.shape[1]) >= pool_len[prod][:, None]] = np.inf
+        shuffled = pool_mat[prod[:, None], np.argsort(keys, axis=1)]
+        supplier_id = shuffled[np.arange(pool_mat.shape[1]) < k[:, None]]
+
+        total = int(k.sum())
+        base_price = np.repeat(self.rng.normal(1.5, 0.2, size=n_deals), k)
+        submitted = np.repeat(self.deals.submitted_ts.to_numpy(), k)
+
+        return pd.DataFrame(
+            {
+                "offer_id": np.arange(total),
+                "deal_id": np.repeat(self.deals.deal_id.to_numpy(), k),
+                "supplier_id": supplier_id,
+                "unit_price": np.round(
+                    base_price * self.rng.uniform(0.9, 1.15, size=total), 3
+                ),
+                "lead_time_days": self.rng.integers(3, 14, size=total),
+                "quoted_margin_pct": np.round(
+                    self.rng.uniform(0.18, 0.30, size=total), 3
+                ),
+                "offer_ts": submitted
+                + pd.to_timedelta(self.rng.integers(2, 48, size=total), unit="h"),
+            }
+        )
 
     def _build_outcomes(self) -> pd.DataFrame:
-        out_rows: list[dict] = []
-        for did, grp in self.offers.groupby("deal_id"):
-            grp = grp.copy()
-            grp["score"] = grp.unit_price.rank() + grp.lead_time_days.rank()
-            winner = grp.loc[grp.score.idxmin()]
-            accepted_flag = int(self.rng.random() < 0.6)  # 60 % accept
-
-            out_rows.append(
-                {
-                    "deal_id": did,
-                    "accepted": accepted_flag,
-                    "accepted_supplier_id": winner.supplier_id if accepted_flag else None,
-                    "close_ts": winner.offer_ts + pd.Timedelta(hours=5),
-                }
-            )
-        return pd.DataFrame(out_rows)
-
-    # save utility
+        # winner = best combined price / lead-time rank within each deal
+        score = (
+            self.offers.groupby("deal_id")[["unit_price", "lead_time_days"]]
+            .rank()
+            .sum(axis=1)
+        )
+        winner_idx = score.groupby(self.offers.deal_id).idxmin()
+        winners = self.offers.loc[
+            winner_idx.to_numpy(), ["deal_id", "supplier_id", "offer_ts"]
+        ].reset_index(drop=True)
+
+        accepted = (self.rng.random(len(winners)) < 0.6).astype(int)  # 60 % accept
+        close_ts = (
+            winners.offer_ts.to_numpy(dtype="datetime64[ns]") + np.timedelta64(5, "h")
+        )
+
+        return pd.DataFrame(
+            {
+                "deal_id": winners.deal_id,
+                "accepted": accepted,
+                "accepted_supplier_id": winners.supplier_id.where(accepted == 1),
+                "close_ts": close_ts,
+            }
+        )
+
+    # save utility (Arrow's C++ writer, much faster than DataFrame.to_csv)
     def _save_csv(self, df: pd.DataFrame, name: str) -> None:
-        df.to_csv(self.out_dir / name, index=False)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # timestamps are whole hours: write them without fractional seconds
+        schema = pa.schema(
+            f.with_type(pa.timestamp("s")) if pa.types.is_timestamp(f.type) else f
+            for f in table.schema
+        )
+        pa_csv.write_csv(table.cast(schema), str(self.out_dir / name))
 
 
 # --------------------------------------------------------------------------